@@ -1,10 +1,13 @@
 import asyncio
+import io
 import json
+import locale
+import logging
+import logging.handlers
 import os
+import queue
 import subprocess
-import threading
-import traceback
-from datetime import datetime
+import sys
 from typing import Optional
 
 import discord
@@ -44,6 +47,11 @@ if not TOKEN:
 
 SERVER_DIR = config["server"]["directory"]
 START_BAT = os.path.join(SERVER_DIR, config["server"]["start_script"])
+SERVER_LOG = os.path.join(SERVER_DIR, "server.log")
+# Server console output is decoded like text-mode pipes would (locale encoding)
+SERVER_ENCODING = locale.getpreferredencoding(False)
+SERVER_OUTPUT_LINE_LIMIT = 1024 * 1024
+DISCORD_MESSAGE_LIMIT = 1900
 LOG_FILE = config["logging"]["bot_log_file"]
 
 # Verify paths
@@ -60,7 +68,8 @@ LANG = config.get("language", "en")
 TRANSLATIONS = config["translations"][LANG]
 
 # Global state
-server_process: Optional[subprocess.Popen] = None
+server_process: Optional[asyncio.subprocess.Process] = None
+monitor_task: Optional[asyncio.Task] = None  # Only keeps a strong reference so the task isn't GC'd
 server_in_error = False
 last_exit_code = None
 last_status = None  # Changed from "Offline" to None to force initial update
@@ -69,46 +78,115 @@ last_status = None  # Changed from "Offline" to None to force initial update
 # ===============================
 #   Logging
 # ===============================
-def get_timestamp() -> str:
-    """Get formatted timestamp"""
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+LOG_FORMAT = "[%(asctime)s] [%(tag)s] %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Map log tags used across the bot to logging levels
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "STATUS": logging.INFO,
+    "SERVER": logging.INFO,
+    "WARN": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+logger = logging.getLogger("bot")
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route log records through a queue so file and console I/O run on a background thread"""
+    formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    listener.start()
+    return listener
+
+
+log_listener = setup_logging()
 
 
 def log(msg: str, level: str = "INFO"):
     """Write log message with timestamp"""
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{get_timestamp()}] [{level}] {msg}\n")
-        print(f"[{get_timestamp()}] [{level}] {msg}")
-    except Exception as e:
-        print(f"[{get_timestamp()}] [ERROR] Failed to write log: {e}")
+    logger.log(LOG_LEVELS.get(level, logging.INFO), msg, extra={"tag": level})
 
 
 def log_exception(msg: str):
     """Write error log with timestamp and traceback"""
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{get_timestamp()}] [ERROR] {msg}\n")
-            f.write(traceback.format_exc() + "\n")
-        print(f"[{get_timestamp()}] [ERROR] {msg}")
-        print(traceback.format_exc())
-    except Exception as e:
-        print(f"[{get_timestamp()}] [ERROR] Failed to write error log: {e}")
+    logger.exception(msg, extra={"tag": "ERROR"})
 
 
-def read_last_log_lines(n: int = 20) -> str:
+async def read_last_log_lines(n: int = 20) -> str:
     """Read last N lines from log file"""
     if not os.path.exists(LOG_FILE):
         return TRANSLATIONS["no_logs"]
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            return "".join(lines[-n:]) if lines else TRANSLATIONS["no_logs"]
+        return await tail_file_async(LOG_FILE, n) or TRANSLATIONS["no_logs"]
     except Exception as e:
         log_exception(f"Failed to read log file: {e}")
         return f"(error reading logs: {e})"
 
 
+# Cache of file tails keyed by (path, n) -> ((mtime_ns, size), text)
+_tail_cache = {}
+_tail_locks = {}
+TAIL_CHUNK_SIZE = 8192
+
+
+def tail_file(path: str, n: int) -> str:
+    """Read last N lines of a file by seeking backwards from the end"""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _tail_cache.get((path, n))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        chunks = []
+        newlines = 0
+        # Need n+1 newlines to be sure the first of the n lines is complete
+        while pos > 0 and newlines <= n:
+            step = min(TAIL_CHUNK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+
+    data = b"".join(reversed(chunks)).decode("utf-8", errors="replace")
+    text = "".join(data.splitlines(keepends=True)[-n:])
+    _tail_cache[(path, n)] = (key, text)
+    return text
+
+
+async def tail_file_async(path: str, n: int) -> str:
+    """Read file tail in a worker thread, one read per file at a time"""
+    lock = _tail_locks.get(path)
+    if lock is None:
+        lock = _tail_locks[path] = asyncio.Lock()
+    async with lock:
+        return await asyncio.to_thread(tail_file, path, n)
+
+
 # ===============================
 #   Process management utilities
 # ===============================
@@ -131,22 +209,33 @@ def kill_process_tree(pid: int):
 # ===============================
 #   Process monitoring
 # ===============================
-def monitor_process():
+async def monitor_process():
     """Monitor server process and log when it exits"""
-    global server_process, server_in_error, last_exit_code
+    global server_in_error, last_exit_code
 
-    if server_process is None:
+    process = server_process
+    if process is None:
         return
 
     try:
         # Read output line by line
-        for line in server_process.stdout:
-            stripped = line.strip()
+        while True:
+            try:
+                raw = await process.stdout.readline()
+            except ValueError:
+                # Line exceeded SERVER_OUTPUT_LINE_LIMIT and was discarded - keep draining
+                # so the server never blocks on a full stdout pipe
+                log(f"Skipped server output line longer than {SERVER_OUTPUT_LINE_LIMIT} bytes", "WARN")
+                continue
+            if not raw:
+                break
+
+            stripped = raw.decode(SERVER_ENCODING, errors="replace").strip()
             if stripped:  # Only log non-empty lines
                 log(f"{stripped}", "SERVER")
 
         # Process ended, get exit code
-        exit_code = server_process.wait()
+        exit_code = await process.wait()
         last_exit_code = exit_code
 
         if exit_code != 0:
@@ -205,6 +294,23 @@ bot = Bot()
 # ===============================
 #   Helpers
 # ===============================
+# Map status text to Discord presence
+STATUS_PRESENCE = {
+    "Online": (discord.Status.online, TRANSLATIONS.get("status_online", "🟢 Server Online")),
+    "Offline": (discord.Status.dnd, TRANSLATIONS.get("status_offline", "⚫ Server Offline")),
+    "Starting...": (discord.Status.idle, TRANSLATIONS.get("status_starting", "⏳ Starting...")),
+    "Stopping...": (discord.Status.idle, TRANSLATIONS.get("status_stopping", "⏳ Stopping...")),
+    "Error": (discord.Status.dnd, TRANSLATIONS.get("status_error", "🔴 Server Error")),
+}
+
+# Server state line shown by /status
+SERVER_STATE_TEXT = {
+    "Online": f"🟢 {TRANSLATIONS.get('server_online', 'Online')}",
+    "Offline": f"⚫ {TRANSLATIONS.get('server_offline', 'Offline')}",
+    "Error": f"🔴 {TRANSLATIONS.get('server_error', 'Error')}",
+}
+
+
 async def set_status(text: str):
     """Set bot Discord status with appropriate presence"""
     global last_status
@@ -219,16 +325,7 @@ async def set_status(text: str):
             log("Bot not ready, cannot set status", "DEBUG")
             return
 
-        # Map status text to Discord presence
-        status_map = {
-            "Online": (discord.Status.online, TRANSLATIONS.get("status_online", "🟢 Server Online")),
-            "Offline": (discord.Status.dnd, TRANSLATIONS.get("status_offline", "⚫ Server Offline")),
-            "Starting...": (discord.Status.idle, TRANSLATIONS.get("status_starting", "⏳ Starting...")),
-            "Stopping...": (discord.Status.idle, TRANSLATIONS.get("status_stopping", "⏳ Stopping...")),
-            "Error": (discord.Status.dnd, TRANSLATIONS.get("status_error", "🔴 Server Error")),
-        }
-
-        discord_status, activity_text = status_map.get(text, (discord.Status.online, text))
+        discord_status, activity_text = STATUS_PRESENCE.get(text, (discord.Status.online, text))
 
         await bot.change_presence(
             status=discord_status,
@@ -240,14 +337,18 @@ async def set_status(text: str):
         log_exception(f"Failed to set status to: {text}")
 
 
+def log_attachment(text: str, filename: str) -> discord.File:
+    """Wrap log text in a file attachment for replies over Discord's limit"""
+    return discord.File(io.BytesIO(text.encode("utf-8")), filename=filename)
+
+
 def server_running() -> bool:
     """Check if server process is running"""
     if server_process is None:
         return False
 
     # Check if process is still alive
-    poll = server_process.poll()
-    return poll is None
+    return server_process.returncode is None
 
 
 # ===============================
@@ -258,7 +359,7 @@ def server_running() -> bool:
     description=TRANSLATIONS["cmd_start_desc"]
 )
 async def start_server(interaction: discord.Interaction):
-    global server_process, server_in_error, last_exit_code
+    global server_process, monitor_task, server_in_error, last_exit_code
 
     if server_running():
         return await interaction.response.send_message(TRANSLATIONS["already_running"])
@@ -275,24 +376,20 @@ async def start_server(interaction: discord.Interaction):
         log(f"Working dir: {SERVER_DIR}", "DEBUG")
 
         # Don't use CREATE_NEW_CONSOLE - it breaks stdout capture
-        server_process = subprocess.Popen(
+        server_process = await asyncio.create_subprocess_exec(
             START_BAT,
             cwd=SERVER_DIR,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-            shell=False
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=SERVER_OUTPUT_LINE_LIMIT
         )
 
         log(f"Process started with PID {server_process.pid}", "INFO")
 
-        # Start monitoring thread immediately
-        monitor_thread = threading.Thread(target=monitor_process, daemon=True)
-        monitor_thread.start()
-        log("Monitor thread started", "DEBUG")
+        # Start monitoring task immediately
+        monitor_task = asyncio.create_task(monitor_process())
+        log("Monitor task started", "DEBUG")
 
         # Give it a moment to start up
         await asyncio.sleep(3)
@@ -305,13 +402,10 @@ async def start_server(interaction: discord.Interaction):
             log(f"Process died immediately with code {exit_code}", "ERROR")
 
             # Try to get last few lines from server.log if it exists
-            server_log = os.path.join(SERVER_DIR, "server.log")
             error_detail = ""
-            if os.path.exists(server_log):
+            if os.path.exists(SERVER_LOG):
                 try:
-                    with open(server_log, "r", encoding="utf-8") as f:
-                        lines = f.readlines()
-                        error_detail = "\n" + "".join(lines[-10:])
+                    error_detail = "\n" + await tail_file_async(SERVER_LOG, 10)
                 except Exception as e:
                     log(f"Failed to read server.log: {e}", "WARN")
 
@@ -360,8 +454,8 @@ async def stop_server(interaction: discord.Interaction):
     log("=== STOP COMMAND CALLED ===", "INFO")
 
     try:
-        server_process.stdin.write("stop\n")
-        server_process.stdin.flush()
+        server_process.stdin.write(b"stop\n")
+        await server_process.stdin.drain()
         log("Stop command sent to server", "INFO")
     except Exception as e:
         server_in_error = True
@@ -369,11 +463,9 @@ async def stop_server(interaction: discord.Interaction):
         await set_status("Error")
         return await interaction.followup.send(TRANSLATIONS["stop_send_error"])
 
-    # Use async wait to not block event loop
-    loop = asyncio.get_event_loop()
     try:
         exit_code = await asyncio.wait_for(
-            loop.run_in_executor(None, server_process.wait),
+            server_process.wait(),
             timeout=config["server"]["stop_timeout"]
         )
         last_exit_code = exit_code
@@ -426,18 +518,17 @@ async def kill_server(interaction: discord.Interaction):
 
     try:
         # Kill the entire process tree on Windows
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, kill_process_tree, pid)
+        await asyncio.to_thread(kill_process_tree, pid)
 
         # Give it a moment to die
         await asyncio.sleep(2)
 
         # Try to get exit code if available
         try:
-            if server_process.poll() is None:
+            if server_process.returncode is None:
                 # Still running somehow, force kill again
                 server_process.kill()
-            last_exit_code = server_process.poll()
+            last_exit_code = server_process.returncode
         except Exception as e:
             log(f"Error getting exit code after kill: {e}", "DEBUG")
             last_exit_code = -1  # Force killed
@@ -471,38 +562,39 @@ async def status_cmd(interaction: discord.Interaction):
 
     # Status emoji and text
     if running:
-        status = f"🟢 {TRANSLATIONS.get('server_online', 'Online')}"
+        status = SERVER_STATE_TEXT["Online"]
     elif server_in_error:
-        status = f"🔴 {TRANSLATIONS.get('server_error', 'Error')}"
+        status = SERVER_STATE_TEXT["Error"]
     else:
-        status = f"⚫ {TRANSLATIONS.get('server_offline', 'Offline')}"
+        status = SERVER_STATE_TEXT["Offline"]
 
     pid = server_process.pid if running else "—"
 
-    last_lines = read_last_log_lines(config["logging"]["status_log_lines"])
+    last_lines = await read_last_log_lines(config["logging"]["status_log_lines"])
 
     # Also check server.log
-    server_log_path = os.path.join(SERVER_DIR, "server.log")
+    last_5 = None
     server_log_info = ""
-    if os.path.exists(server_log_path):
+    if os.path.exists(SERVER_LOG):
         try:
-            with open(server_log_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                last_5 = "".join(lines[-5:]) if lines else TRANSLATIONS["no_logs"]
-                server_log_info = f"\n\n**Server.log ({TRANSLATIONS.get('last_lines', 'last 5 lines')}):**\n```{last_5}```"
+            last_5 = await tail_file_async(SERVER_LOG, 5) or TRANSLATIONS["no_logs"]
+            server_log_info = f"\n\n**Server.log ({TRANSLATIONS.get('last_lines', 'last 5 lines')}):**\n```{last_5}```"
         except Exception as e:
             log(f"Failed to read server.log in status command: {e}", "WARN")
 
-    msg = (
+    summary = (
         f"**{TRANSLATIONS['status_label']}:** {status}\n"
         f"**PID:** {pid}\n"
-        f"**{TRANSLATIONS['last_exit_code']}:** {last_exit_code if last_exit_code is not None else '—'}\n\n"
-        f"**{TRANSLATIONS['recent_logs']}:**\n```{last_lines}```{server_log_info}"
+        f"**{TRANSLATIONS['last_exit_code']}:** {last_exit_code if last_exit_code is not None else '—'}"
     )
+    msg = f"{summary}\n\n**{TRANSLATIONS['recent_logs']}:**\n```{last_lines}```{server_log_info}"
 
-    # Discord has 2000 char limit
-    if len(msg) > 1900:
-        msg = msg[:1900] + "\n...(truncated)```"
+    # Discord has 2000 char limit - attach logs as files instead of truncating
+    if len(msg) > DISCORD_MESSAGE_LIMIT:
+        files = [log_attachment(last_lines, "bot.log")]
+        if last_5 is not None:
+            files.append(log_attachment(last_5, "server.log"))
+        return await interaction.response.send_message(summary, files=files)
 
     await interaction.response.send_message(msg)
 
@@ -534,23 +626,22 @@ async def config_cmd(interaction: discord.Interaction):
     description=TRANSLATIONS.get("cmd_logs_desc", "Show last lines from server.log file")
 )
 async def logs_cmd(interaction: discord.Interaction):
-    server_log_path = os.path.join(SERVER_DIR, "server.log")
-
-    if not os.path.exists(server_log_path):
+    if not os.path.exists(SERVER_LOG):
         return await interaction.response.send_message(
             TRANSLATIONS.get("logs_not_found", "❌ server.log file not found. Server may not have started yet.")
         )
 
     try:
-        with open(server_log_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            last_lines = "".join(lines[-30:]) if lines else TRANSLATIONS["no_logs"]
+        last_lines = await tail_file_async(SERVER_LOG, 30) or TRANSLATIONS["no_logs"]
 
-        msg = f"**Server.log ({TRANSLATIONS.get('last_lines_30', 'last 30 lines')}):**\n```{last_lines}```"
+        header = f"**Server.log ({TRANSLATIONS.get('last_lines_30', 'last 30 lines')}):**"
+        msg = f"{header}\n```{last_lines}```"
 
-        # Discord limit
-        if len(msg) > 1900:
-            msg = msg[:1900] + "\n...(truncated)```"
+        # Discord limit - attach the tail as a file instead of truncating
+        if len(msg) > DISCORD_MESSAGE_LIMIT:
+            return await interaction.response.send_message(
+                header, file=log_attachment(last_lines, "server.log")
+            )
 
         await interaction.response.send_message(msg)
     except Exception as e:
@@ -606,3 +697,5 @@ if __name__ == "__main__":
     except Exception as e:
         log_exception(f"Bot crashed: {e}")
         raise
+    finally:
+        log_listener.stop()
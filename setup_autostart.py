@@ -2,14 +2,51 @@
 Setup script for configuring Minecraft Discord Bot to run on Windows startup.
 Uses Windows Task Scheduler to run the bot automatically when the system boots.
 """
+import functools
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+TASK_NAME = "MinecraftBot"
 
+# Resolved once - the interpreter and script locations can't change while running
+BOT_PATH = Path(__file__).parent.absolute() / "bot.py"
+# Use pythonw.exe for no console window
+PYTHONW_PATH = Path(sys.executable).with_name("pythonw.exe")
+
+SEPARATOR = "=" * 60
+
+BANNER = f"""{SEPARATOR}
+Minecraft Discord Bot - Autostart Setup
+{SEPARATOR}
+
+"""
+
+SUCCESS_MESSAGE = f"""Success! Bot configured to start automatically on system startup.
+
+To start the bot now without rebooting:
+  schtasks /run /tn {TASK_NAME}
+
+To stop the bot:
+  taskkill /f /im pythonw.exe /fi "WINDOWTITLE eq bot.py*"
+
+To remove autostart:
+  schtasks /delete /tn {TASK_NAME} /f
+
+"""
+
+# Task Scheduler 2.0 API constants
+TASK_TRIGGER_BOOT = 8
+TASK_ACTION_EXEC = 0
+TASK_RUNLEVEL_HIGHEST = 1
+TASK_CREATE_OR_UPDATE = 6
+TASK_LOGON_INTERACTIVE_TOKEN = 3
+
+
+@functools.cache
 def is_admin():
-    """Check if script is running with administrator privileges"""
+    """Check if script is running with administrator privileges (cached, elevation can't change)"""
     try:
         return os.getuid() == 0
     except AttributeError:
@@ -20,61 +57,100 @@ def is_admin():
             return False
 
 
-def setup_task_scheduler():
-    """Configure Windows Task Scheduler to run bot on startup"""
-
-    # Get paths
-    bot_dir = Path(__file__).parent.absolute()
-    bot_path = bot_dir / "bot.py"
-
-    # Use pythonw.exe for no console window
-    python_path = Path(sys.executable)
-    pythonw_path = python_path.parent / "pythonw.exe"
-
-    if not pythonw_path.exists():
-        print(f"Error: pythonw.exe not found at {pythonw_path}")
-        print("Make sure Python is properly installed.")
+def register_task_com(pythonw_path, bot_path):
+    """Register startup task through the Task Scheduler COM API (requires pywin32)"""
+    try:
+        import pywintypes
+        import win32com.client
+    except ImportError:
         return False
 
-    if not bot_path.exists():
-        print(f"Error: bot.py not found at {bot_path}")
+    try:
+        scheduler = win32com.client.Dispatch("Schedule.Service")
+        scheduler.Connect()
+        root = scheduler.GetFolder("\\")
+
+        task_def = scheduler.NewTask(0)
+        task_def.RegistrationInfo.Description = "Minecraft Discord Bot"
+        task_def.Principal.RunLevel = TASK_RUNLEVEL_HIGHEST
+        task_def.Triggers.Create(TASK_TRIGGER_BOOT)
+
+        action = task_def.Actions.Create(TASK_ACTION_EXEC)
+        action.Path = str(pythonw_path)
+        action.Arguments = f'"{bot_path}"'
+        action.WorkingDirectory = str(bot_path.parent)
+
+        root.RegisterTaskDefinition(
+            TASK_NAME, task_def, TASK_CREATE_OR_UPDATE,
+            None, None, TASK_LOGON_INTERACTIVE_TOKEN
+        )
+        return True
+    except pywintypes.com_error as e:
+        print(f"Task Scheduler API error: {e}")
+        print("Falling back to schtasks...")
         return False
 
-    print("Configuring Windows Task Scheduler...")
-    print(f"Bot location: {bot_path}")
-    print(f"Python location: {pythonw_path}")
-    print()
 
-    # Create scheduled task
+def register_task_schtasks(pythonw_path, bot_path):
+    """Register startup task by calling schtasks.exe"""
     cmd = [
         "schtasks", "/create",
-        "/tn", "MinecraftBot",
+        "/tn", TASK_NAME,
         "/tr", f'"{pythonw_path}" "{bot_path}"',
         "/sc", "onstart",
         "/rl", "highest",
         "/f"  # Force overwrite if exists
     ]
 
+    # Only stderr is needed, and only on failure
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        check=False
+    )
+
+    if result.returncode != 0:
+        print(f"Error creating scheduled task:")
+        # Console tools write to pipes in the OEM code page, not UTF-8
+        print(result.stderr.decode("oem", errors="replace"))
+        return False
+
+    # schtasks has no option for the working directory, bot.py needs it to find config.json
+    print("Warning: schtasks cannot set the task's working directory.")
+    print(f"Open Task Scheduler, edit the '{TASK_NAME}' task's action and set 'Start in' to:")
+    print(f"  {bot_path.parent}")
+    print()
+    return True
+
+
+def setup_task_scheduler():
+    """Configure Windows Task Scheduler to run bot on startup"""
+
+    if not PYTHONW_PATH.exists():
+        print(f"Error: pythonw.exe not found at {PYTHONW_PATH}")
+        print("Make sure Python is properly installed.")
+        return False
+
+    if not BOT_PATH.exists():
+        print(f"Error: bot.py not found at {BOT_PATH}")
+        return False
+
+    print("Configuring Windows Task Scheduler...")
+    print(f"Bot location: {BOT_PATH}")
+    print(f"Python location: {PYTHONW_PATH}")
+    print()
+
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-        if result.returncode == 0:
-            print("Success! Bot configured to start automatically on system startup.")
-            print()
-            print("To start the bot now without rebooting:")
-            print("  schtasks /run /tn MinecraftBot")
-            print()
-            print("To stop the bot:")
-            print("  taskkill /f /im pythonw.exe /fi \"WINDOWTITLE eq bot.py*\"")
-            print()
-            print("To remove autostart:")
-            print("  schtasks /delete /tn MinecraftBot /f")
-            print()
+        # Create scheduled task, preferring the COM API over spawning schtasks
+        success = (register_task_com(PYTHONW_PATH, BOT_PATH)
+                   or register_task_schtasks(PYTHONW_PATH, BOT_PATH))
+
+        if success:
+            sys.stdout.write(SUCCESS_MESSAGE)
             return True
-        else:
-            print(f"Error creating scheduled task:")
-            print(result.stderr)
-            return False
+        return False
 
     except Exception as e:
         print(f"Error: {e}")
@@ -82,10 +158,7 @@ def setup_task_scheduler():
 
 
 def main():
-    print("=" * 60)
-    print("Minecraft Discord Bot - Autostart Setup")
-    print("=" * 60)
-    print()
+    sys.stdout.write(BANNER)
 
     # Check operating system
     if os.name != 'nt':
@@ -108,7 +181,7 @@ def main():
     success = setup_task_scheduler()
 
     print()
-    print("=" * 60)
+    print(SEPARATOR)
 
     return 0 if success else 1
 